@@ -1,8 +1,23 @@
+import math
+
 import numpy as np
+from scipy.linalg import get_blas_funcs, qr
 
 from pysensors.optimizers._qr import QR
+from pysensors.utils._norm_calc import constraint_cache
 from pysensors.utils._norm_calc import returnInstance as normCalcReturnInstance
 
+# Number of entries of the trailing matrix updated at a time by the block reflector
+_TILE_SIZE = 2**18
+
+
+def _real_col_sqnorms(a):
+    return np.einsum("ij,ij->j", a, a)
+
+
+def _complex_col_sqnorms(a):
+    return np.einsum("ij,ij->j", a.conj(), a).real
+
 
 class GQR(QR):
     """
@@ -50,6 +65,13 @@ class GQR(QR):
               be less than or equal to n_const_sensors.
             exact_n_const_sensors : The number of sensors in the constrained region
              should be exactly equal to n_const_sensors.
+        block_size : integer,
+            Number of Householder reflectors accumulated before they are applied
+            to the trailing matrix as a block.
+        dtype : data-type, optional
+            Floating point precision used for the factorization, e.g.
+            ``np.float32`` to halve the memory traffic. By default the precision
+            of ``basis_matrix`` is kept.
         """
         self.pivots_ = None
         self.idx_constrained = []
@@ -60,6 +82,8 @@ class GQR(QR):
         self.nx = None
         self.ny = None
         self.r = 1
+        self.block_size = 32
+        self.dtype = None
 
     def fit(self, basis_matrix, **optimizer_kws):
         """
@@ -79,56 +103,244 @@ class GQR(QR):
             setattr(self, name, optimizer_kws.get(name, getattr(self, name)))
             for name in optimizer_kws.keys()
         ]
+        if not isinstance(self.block_size, (int, np.integer)) or self.block_size <= 0:
+            raise ValueError("block_size must be a positive integer")
         self._norm_calc_Instance = normCalcReturnInstance(self, self.constraint_option)
         n_features, n_samples = basis_matrix.shape  # We transpose basis_matrix below
         max_const_sensors = len(  # noqa: F841
             self.idx_constrained
         )  # Maximum number of sensors allowed in the constrained region
+        self._idx_constrained = np.asarray(self.idx_constrained)
+        self._constrained_mask = np.zeros(n_features, dtype=bool)
+        self._constrained_mask[self._idx_constrained.astype(int)] = True
 
         # Initialize helper variables
-        R = basis_matrix.conj().T.copy()
+        dtype = basis_matrix.dtype if self.dtype is None else np.dtype(self.dtype)
+        if np.iscomplexobj(basis_matrix):
+            dtype = np.promote_types(dtype, np.complex64)
+        # The blocked factorization mostly streams rows of the (usually wide) R, so
+        # it is stored in C order whatever the memory layout of basis_matrix
+        R = basis_matrix.conj().T.astype(dtype, order="C")
+
+        if self.constraint_option == "":
+            # Without constraints this is plain column pivoted QR, for which LAPACK's
+            # blocked ?geqp3 is called directly
+            _, self.pivots_ = qr(
+                R, overwrite_a=True, mode="r", pivoting=True, check_finite=False
+            )
+            return self
+
         p = np.arange(n_features)
         k = min(n_samples, n_features)
 
-        for j in range(k):
-            r = R[j:, j:]
+        # Sums of squares are taken with einsum, which does not materialize abs(R)**2
+        self._col_sqnorms = (
+            _complex_col_sqnorms if np.iscomplexobj(R) else _real_col_sqnorms
+        )
+        # Squared column norms, downdated as the factorization proceeds, and their
+        # values at the last time they were computed exactly
+        col_sqnorms = self._col_sqnorms(R)
+        ref_sqnorms = col_sqnorms.copy()
+        # Below this squared norm every remaining column is rounding error, i.e. the
+        # rank of basis_matrix has been used up
+        rank_sqtol = (max(R.shape) * np.finfo(R.dtype).eps) ** 2 * col_sqnorms.max()
+
+        # The constraint arguments do not change during the factorization, so they
+        # are converted once instead of on every call of the constraint function
+        self._norm_calc_kws = dict(
+            all_sensors=np.asarray(self.all_sensors),
+            n_sensors=self.n_sensors,
+            nx=self.nx,
+            ny=self.ny,
+            r=self.r,
+            constrained_mask=self._constrained_mask,
+            # Ruled out locations can then never win the argmax over locations
+            # which are allowed but whose columns are already exhausted
+            fill_value=-np.inf,
+        )
+        self._norm_calc_kws.update(
+            constraint_cache(
+                self._idx_constrained, self.n_const_sensors, **self._norm_calc_kws
+            )
+        )
 
-            dlens = np.sqrt(np.sum(np.abs(r) ** 2, axis=0))
-            dlens_updated = self._norm_calc_Instance(
-                self.idx_constrained,
-                dlens,
+        for j in range(0, k, self.block_size):
+            j_exhausted = self._panel_qr(
+                R,
                 p,
+                col_sqnorms,
+                ref_sqnorms,
                 j,
-                self.n_const_sensors,
-                dlens_old=dlens,
-                all_sensors=self.all_sensors,
-                n_sensors=self.n_sensors,
-                nx=self.nx,
-                ny=self.ny,
-                r=self.r,
+                min(self.block_size, k - j),
+                rank_sqtol,
             )
-            i_piv = np.argmax(dlens_updated)
-            dlen = dlens_updated[i_piv]
+            if j_exhausted is not None:
+                self._rank_exhausted_pivots(p, col_sqnorms, j_exhausted, k)
+                break
+        self.pivots_ = p
+        return self
 
-            if dlen > 0:
-                u = r[:, i_piv] / dlen
-                u[0] += np.sign(u[0]) + (u[0] == 0)
-                u /= np.sqrt(abs(u[0]))
-            else:
-                u = r[:, i_piv]
-                u[0] = np.sqrt(2)
+    def _rank_exhausted_pivots(self, p, col_sqnorms, j0, k):
+        """
+        Choose the pivots ``j0:k`` once all remaining columns are exhausted. Further
+        reflectors would not change which locations the constraints allow, so the
+        remaining sensors are ranked on the residual norms alone, without updating R.
+        """
+        for j in range(j0, k):
+            c = j + self._select_pivot(col_sqnorms, p, j)
+            p[j], p[c] = p[c], p[j]
+            col_sqnorms[j], col_sqnorms[c] = col_sqnorms[c], col_sqnorms[j]
+
+    def _select_pivot(self, col_sqnorms, p, j):
+        """
+        Choose the next pivot among the columns ``j:`` allowed by the constraints
+        and return its position relative to ``j``.
+        """
+        dlens = np.sqrt(col_sqnorms[j:])
+        dlens_updated = self._norm_calc_Instance(
+            self._idx_constrained,
+            dlens,
+            p,
+            j,
+            self.n_const_sensors,
+            dlens_old=dlens,
+            **self._norm_calc_kws,
+        )
+        return np.argmax(dlens_updated)
+
+    def _panel_qr(self, R, p, col_sqnorms, ref_sqnorms, j0, b, rank_sqtol):
+        """
+        Factor the panel ``R[j0:, j0:j0 + b]`` with ``b`` pivoted Householder steps
+        and apply the accumulated reflectors to the trailing columns in one go.
+
+        The reflectors ``H_i = I - u_i u_i^H`` of the panel are collected in compact
+        WY form, ``H_0 H_1 ... H_{b-1} = I - V T V^H``, so the trailing matrix is
+        updated with matrix-matrix products instead of one rank-1 update per sensor.
+        Columns of the trailing matrix are only brought up to date when they are
+        selected as the pivot. The rows of the panel are brought up to date as they
+        are eliminated, since they are needed to downdate the column norms anyway,
+        which leaves only the rows below the panel to the block update. Columns are
+        not swapped within the panel; they are addressed through a permutation and
+        the columns displaced by the pivots are moved once the panel is done.
+
+        As in LAPACK's ``dlaqps``, a downdated norm that has lost too much of its
+        value to cancellation (less than ``sqrt(eps)`` of the last exactly computed
+        norm) is recomputed from the updated column.
+
+        Parameters
+        ----------
+        R: np.ndarray, shape [n_samples, n_features]
+            Matrix being factored, modified in place. On exit only the trailing
+            matrix ``R[j0 + b:, j0 + b:]`` is kept up to date.
+        p: np.ndarray, shape [n_features]
+            Column permutation, modified in place.
+        col_sqnorms: np.ndarray, shape [n_features]
+            Squared norms of the columns of the trailing matrix, modified in place.
+        ref_sqnorms: np.ndarray, shape [n_features]
+            Squared norms of the columns when they were last computed exactly,
+            modified in place.
+        j0: int,
+            Index of the first column of the panel.
+        b: int,
+            Width of the panel.
+        rank_sqtol: float,
+            Squared column norm below which a column is considered exhausted.
+
+        Returns
+        -------
+        j: int or None
+            Index of the column at which the factorization was stopped because
+            all remaining columns were exhausted, or None if the panel was
+            factored completely.
+        """
+        m, n = R.shape
+        V = np.zeros((m - j0, b), dtype=R.dtype)
+        T = np.zeros((b, b), dtype=R.dtype)
+        Y = np.zeros((b, n - j0), dtype=R.dtype)  # Y = V^H R[j0:, j0:]
+        tol = np.sqrt(np.finfo(R.dtype).eps)
+        (gemv,) = get_blas_funcs(("gemv",), (R,))
+
+        # Columns are not moved inside the panel: position j0 + i of the trailing
+        # matrix is stored in column j0 + perm[i] of R (and column perm[i] of Y)
+        perm = np.arange(n - j0)
+
+        for i in range(b):
+            j = j0 + i
+            if col_sqnorms[j:].max() <= rank_sqtol:
+                return j
+            i_piv = self._select_pivot(col_sqnorms, p, j)
 
             # Track column pivots
-            i_piv += (
-                j  # true permutation index is i_piv shifted by the iteration counter j
-            )
-            p[[j, i_piv]] = p[[i_piv, j]]
+            i_piv += i  # position of the pivot relative to the start of the panel
+            c = j0 + i_piv
+            p[j], p[c] = p[c], p[j]
 
             # Switch columns
-            R[:, [j, i_piv]] = R[:, [i_piv, j]]
+            if c != j:
+                perm[i], perm[i_piv] = perm[i_piv], perm[i]
+                col_sqnorms[j], col_sqnorms[c] = col_sqnorms[c], col_sqnorms[j]
+                ref_sqnorms[j], ref_sqnorms[c] = ref_sqnorms[c], ref_sqnorms[j]
+            q = perm[i]
 
-            # Apply reflector
-            R[j:, j:] -= np.outer(u, np.dot(u, R[j:, j:]))
-            R[j + 1 :, j] = 0
-        self.pivots_ = p
-        return self
+            # Bring the pivot column up to date with the reflectors of the panel
+            x = R[j:, j0 + q]
+            x -= V[i:, :i] @ (T[:i, :i].conj().T @ Y[:i, q])
+            # The downdated norm of a nearly exhausted column can be stale, so the
+            # reflector is built from (and the norm replaced by) the exact norm of x
+            xnorm = np.linalg.norm(x)
+            col_sqnorms[j] = xnorm**2
+
+            if xnorm > 0:
+                u = x / xnorm
+                # Scalar arithmetic on u[0] as a Python number; u0 / |u0| is the sign
+                # of real data and the phase of complex data
+                u0 = u[0].item()
+                u0 += u0 / abs(u0) if u0 != 0 else 1.0
+                u[0] = u0
+                u /= math.sqrt(abs(u0))
+            else:
+                u = x.copy()
+                u[0] = math.sqrt(2)
+
+            # Applying the reflector to the pivot column itself would only produce the
+            # diagonal entry of the triangular factor, which is never read since only
+            # the pivots are kept
+
+            # Append the reflector to V, T and Y
+            V[i:, i] = u
+            T[:i, i] = -T[:i, :i] @ (u.conj() @ V[i:, :i]).conj()
+            T[i, i] = 1
+            np.matmul(u.conj(), R[j:, j0:], out=Y[i])
+
+            # Update row j of the trailing matrix and downdate the norms with it
+            # (row -= Y^T w as one gemv, in place on the contiguous row of R; the
+            # result is assigned back in case gemv had to work on a cast copy)
+            row = R[j, j0:]
+            w = T[: i + 1, : i + 1].conj() @ V[i, : i + 1]
+            row[:] = gemv(-1, Y[: i + 1].T, w, beta=1, y=row, overwrite_y=True)
+            trailing = col_sqnorms[j + 1 :]
+            trailing -= np.abs(row[perm[i + 1 :]]) ** 2
+            np.maximum(trailing, 0, out=trailing)
+
+            ref = ref_sqnorms[j + 1 :]
+            stale = np.flatnonzero((trailing <= tol * ref) & (ref > 0)) + i + 1
+            if stale.size:
+                cols = R[j + 1 :, j0 + perm[stale]] - V[i + 1 :, : i + 1] @ (
+                    T[: i + 1, : i + 1].conj().T @ Y[: i + 1, perm[stale]]
+                )
+                col_sqnorms[j0 + stale] = self._col_sqnorms(cols)
+                ref_sqnorms[j0 + stale] = col_sqnorms[j0 + stale]
+
+        # Only the rows below the panel are needed from here on, and at most b
+        # trailing columns have been displaced by the pivots of the panel
+        j1 = j0 + b
+        moved = np.flatnonzero(perm[b:] != np.arange(b, n - j0)) + b
+        R[j1:, j0 + moved] = R[j1:, j0 + perm[moved]]
+
+        # Apply the block reflector to the rows of the trailing matrix below the panel,
+        # a tile of columns at a time so that the temporary V @ W stays small even
+        # when there are many more features than samples
+        W = T.conj().T @ Y[:, perm[b:]]
+        width = max(1, _TILE_SIZE // max(1, m - j1))
+        for c in range(j1, n, width):
+            R[j1:, c : c + width] -= V[b:] @ W[:, c - j1 : c - j1 + width]
@@ -3,12 +3,9 @@ Various utility functions for mapping constrained sensors locations with the col
 indices for class GQR.
 """
 
-import operator
 import os
 import sys
 
-import matplotlib.patches as patches
-import matplotlib.pyplot as plt
 import numpy as np
 import pandas as pd
 
@@ -39,35 +36,23 @@ def get_constrained_sensors_indices(x_min, x_max, y_min, y_max, nx, ny, all_sens
         raise ValueError("all_sensors must be provided")
     if not np.issubdtype(all_sensors.dtype, np.integer):
         raise ValueError("all_sensors must be integers")
+    if all_sensors.ndim != 1:
+        raise ValueError("all_sensors must be a 1D array")
     if x_min >= x_max:
         raise ValueError("x_min must be less than x_max")
     if y_min >= y_max:
         raise ValueError("y_min must be less than y_max")
     if not isinstance(nx, int) or not isinstance(ny, int):
         raise ValueError("nx and ny must be integers")
-    n_features = len(all_sensors)
     a = np.unravel_index(all_sensors, (nx, ny))
-    constrained_sensorsx = []
-    constrained_sensorsy = []
-    for i in range(n_features):
-        if (a[0][i] >= x_min and a[0][i] <= x_max) and (
-            a[1][i] >= y_min and a[1][i] <= y_max
-        ):
-            constrained_sensorsx.append(a[0][i])
-            constrained_sensorsy.append(a[1][i])
-
-    constrained_sensorsx = np.array(constrained_sensorsx)
-    constrained_sensorsy = np.array(constrained_sensorsy)
-    constrained_sensors_array = np.stack(
-        (constrained_sensorsy, constrained_sensorsx), axis=1
-    )
-    constrained_sensors_tuple = np.transpose(constrained_sensors_array)
-    if (
-        len(constrained_sensorsx) == 0
-    ):  # Check to handle condition when number of sensors in the constrained region = 0
+    mask = (a[0] >= x_min) & (a[0] <= x_max) & (a[1] >= y_min) & (a[1] <= y_max)
+    if not mask.any():
+        # Number of sensors in the constrained region = 0
         idx_constrained = []
     else:
-        idx_constrained = np.ravel_multi_index(constrained_sensors_tuple, (nx, ny))
+        idx_constrained = np.ravel_multi_index(
+            (a[0][mask], a[1][mask]), (nx, ny), order="F"
+        )
     return idx_constrained
 
 
@@ -416,6 +401,8 @@ class BaseConstraint(object):
         """
         Function for drawing the constraint defined by the user
         """
+        import matplotlib.pyplot as plt
+
         if plot is None:
             _, ax = plt.subplots()
         else:
@@ -441,6 +428,8 @@ class BaseConstraint(object):
         -----------
         A plot of the constraint on top of the measurement data plot.
         """
+        import matplotlib.pyplot as plt
+
         if plot is None:
             if isinstance(self, Cylinder):
                 self.fig, self.ax = plt.subplots(subplot_kw={"projection": "3d"})
@@ -517,6 +506,8 @@ class BaseConstraint(object):
         -----------
         A plot of the user defined grid showing all possible sensor locations
         """
+        import matplotlib.pyplot as plt
+
         if isinstance(self.data, np.ndarray):
             n_samples, n_features = self.data.shape
             x_val, y_val = get_coordinates_from_indices(all_sensors, self.data)
@@ -743,6 +734,8 @@ class Circle(BaseConstraint):
         ----------
         ax : axis on which the constraint circle should be plotted
         """
+        import matplotlib.patches as patches
+
         if "fill" not in kwargs.keys():
             kwargs["fill"] = False
         if "color" not in kwargs.keys():
@@ -882,41 +875,23 @@ class Cylinder(BaseConstraint):
             y coordinate of point on the grid being evaluated to check whether it
             lies inside or outside the constrained region
         """
-        x, y, z = coords[:]
-        if isinstance(x, float):
-            x, y, z = [x], [y], [z]
-        nPoints = np.shape(np.array(coords).reshape(3, -1))[1]
-        inFlag = np.zeros(nPoints, dtype=bool)
-        for i in range(nPoints):
-            if self.axis == "Z_axis":
-                inFlag[i] = (
-                    (
-                        ((x[i] - self.center_x) ** 2 + (y[i] - self.center_y) ** 2)
-                        <= self.radius**2
-                    )
-                    and self.center_z - self.height / 2 <= z[i]
-                    and z[i] <= self.center_z + self.height / 2
-                )
-            elif self.axis == "Y_axis":
-                inFlag[i] = (
-                    (
-                        ((x[i] - self.center_x) ** 2 + (z[i] - self.center_z) ** 2)
-                        <= self.radius**2
-                    )
-                    and self.center_y - self.height / 2 <= y[i]
-                    and y[i] <= self.center_y + self.height / 2
-                )
-            else:
-                inFlag[i] = (
-                    (
-                        ((y[i] - self.center_y) ** 2 + (z[i] - self.center_z) ** 2)
-                        <= self.radius**2
-                    )
-                    and self.center_x - self.height / 2 <= x[i]
-                    and x[i] <= self.center_x + self.height / 2
-                )
+        x, y, z = (np.asarray(c) for c in coords[:])
+        if self.axis == "Z_axis":
+            radial = (x - self.center_x) ** 2 + (y - self.center_y) ** 2
+            axial, center = z, self.center_z
+        elif self.axis == "Y_axis":
+            radial = (x - self.center_x) ** 2 + (z - self.center_z) ** 2
+            axial, center = y, self.center_y
+        else:
+            radial = (y - self.center_y) ** 2 + (z - self.center_z) ** 2
+            axial, center = x, self.center_x
+        inFlag = (
+            (radial <= self.radius**2)
+            & (center - self.height / 2 <= axial)
+            & (axial <= center + self.height / 2)
+        )
         if self.loc.lower() == "in":
-            return map(operator.not_, inFlag)
+            return ~inFlag
         else:
             return inFlag
 
@@ -1137,6 +1112,8 @@ class Ellipse(BaseConstraint):
         ----------
         ax : axis on which the constraint ellipse should be plotted
         """
+        import matplotlib.patches as patches
+
         if "fill" not in kwargs.keys():
             kwargs["fill"] = False
         if "color" not in kwargs.keys():
@@ -1213,6 +1190,8 @@ class Polygon(BaseConstraint):
         ----------
         ax : axis on which the constraint polygon should be plotted
         """
+        import matplotlib.patches as patches
+
         if "fill" not in kwargs.keys():
             kwargs["fill"] = False
         if "color" not in kwargs.keys():
@@ -1347,7 +1326,7 @@ class UserDefinedConstraints(BaseConstraint):
                     temp = BaseConstraint.functional_constraints(
                         self.functions, self.all_sensors, self.data
                     )
-                    G[:, i] = [x > 0 for x in temp]
+                    G[:, i] = np.asarray(temp) > 0
                     idx_const, rank = (
                         BaseConstraint.get_functionalConstraind_sensors_indices(
                             self.all_sensors, G[:, i]
@@ -1363,7 +1342,7 @@ class UserDefinedConstraints(BaseConstraint):
                         Y_axis=self.Y_axis,
                         Field=self.Field,
                     )
-                    G[:, i] = [x == 0 for x in temp]
+                    G[:, i] = np.asarray(temp) == 0
                     idx_const, rank = (
                         BaseConstraint.get_functionalConstraind_sensors_indices(
                             self.all_sensors, G[:, i]
@@ -1433,7 +1412,7 @@ class UserDefinedConstraints(BaseConstraint):
                     temp = BaseConstraint.functional_constraints(
                         self.functions, self.all_sensors, self.data
                     )
-                    G[:, i] = [x >= 0 for x in temp]
+                    G[:, i] = np.asarray(temp) >= 0
                 elif isinstance(self.data, pd.DataFrame):
                     temp = BaseConstraint.functional_constraints(
                         self.functions,
@@ -1443,7 +1422,7 @@ class UserDefinedConstraints(BaseConstraint):
                         Y_axis=self.Y_axis,
                         Field=self.Field,
                     )
-                    G[:, i] = [x >= 0 for x in temp]
+                    G[:, i] = np.asarray(temp) >= 0
         else:
             G = np.zeros((len(self.all_sensors), 1), dtype=bool)
             if isinstance(self.data, np.ndarray):
@@ -6,6 +6,75 @@ the different types of adaptive constraints for _gqr.py in optimizers.
 import numpy as np
 
 
+def _isin(ids, lin_idx, constrained_mask=None):
+    """
+    Membership test of sensor ids in lin_idx. When given, constrained_mask is a
+    boolean array over all sensor ids that is True at lin_idx, so the test is a
+    single lookup instead of a sort and search of lin_idx on every call.
+    """
+    if constrained_mask is None:
+        return np.isin(ids, lin_idx)
+    return constrained_mask[np.asarray(ids, dtype=int)]
+
+
+def _n_sensors(all_sensors, kwargs):
+    if "n_sensors" in kwargs.keys() and kwargs["n_sensors"] not in [None, 0]:
+        return kwargs["n_sensors"]
+    return len(all_sensors)
+
+
+def _excess_constrained(
+    lin_idx, n_const_sensors, all_sensors, n_sensors, is_const, constrained_mask=None
+):
+    """
+    Constrained sensors ruled out by max_n: when more than n_const_sensors of the
+    first n_sensors of all_sensors are constrained, the constrained sensors ranked
+    beyond the first n_const_sensors of them. Returns None if there are none, or
+    their ids along with a boolean array over all sensor ids that is True at them
+    (None if constrained_mask is not given).
+    """
+    if np.count_nonzero(is_const[:n_sensors]) <= n_const_sensors:
+        return None
+    updated_lin_idx = all_sensors[is_const][n_const_sensors:]
+    if constrained_mask is None:
+        return updated_lin_idx, None
+    excess_mask = np.zeros_like(constrained_mask)
+    excess_mask[updated_lin_idx] = True
+    return updated_lin_idx, excess_mask
+
+
+def constraint_cache(lin_idx, n_const_sensors, **kwargs):
+    """
+    Precompute the parts of the exact_n and max_n constraints which only depend on
+    arguments that are fixed during a fit.
+
+    Parameters
+    ----------
+    lin_idx: np.ndarray, shape [No. of constrained locations]
+        Array which contains the constrained locations of the grid in terms of
+        column indices of basis_matrix.
+    n_const_sensors: int,
+        Number of sensors to be placed in the constrained area.
+    kwargs:
+        The keyword arguments later passed to the constraint functions.
+
+    Returns
+    -------
+    cache : dict, keyword arguments to be passed to the constraint functions along
+    with kwargs.
+    """
+    all_sensors = kwargs.get("all_sensors", [])
+    n_sensors = _n_sensors(all_sensors, kwargs)
+    constrained_mask = kwargs.get("constrained_mask")
+    is_const = _isin(all_sensors, lin_idx, constrained_mask)
+    return dict(
+        is_const=is_const,
+        excess_constrained=_excess_constrained(
+            lin_idx, n_const_sensors, all_sensors, n_sensors, is_const, constrained_mask
+        ),
+    )
+
+
 def unconstrained(lin_idx, dlens, piv, j, n_const_sensors, **kwargs):
     return dlens
 
@@ -27,6 +96,13 @@ def exact_n(lin_idx, dlens, piv, j, n_const_sensors, **kwargs):
         Number of sensors to be placed in the constrained area.
     j: int,
         current sensor to be placed in the QR/GQR algorithm.
+    constrained_mask: np.ndarray, shape [n_features], optional
+        Boolean array which is True at lin_idx.
+    fill_value: float, optional (default 0)
+        Value given to dlens at the locations which are ruled out.
+    is_const: np.ndarray, shape [n_features], optional
+        Boolean array which is True where all_sensors is constrained, as
+        precomputed by constraint_cache.
 
     Returns
     -------
@@ -36,15 +112,17 @@ def exact_n(lin_idx, dlens, piv, j, n_const_sensors, **kwargs):
         all_sensors = kwargs["all_sensors"]
     else:
         all_sensors = []
-    if "n_sensors" in kwargs.keys() and kwargs["n_sensors"] not in [None, 0]:
-        n_sensors = kwargs["n_sensors"]
+    n_sensors = _n_sensors(all_sensors, kwargs)
+    constrained_mask = kwargs.get("constrained_mask")
+    if "is_const" in kwargs.keys():
+        is_const = kwargs["is_const"][:n_sensors]
     else:
-        n_sensors = len(all_sensors)
-    count = np.count_nonzero(np.isin(all_sensors[:j], lin_idx, invert=False))
-    if np.isin(all_sensors[:n_sensors], lin_idx, invert=False).sum() < n_const_sensors:
+        is_const = _isin(all_sensors[:n_sensors], lin_idx, constrained_mask)
+    count = np.count_nonzero(is_const[:j])
+    if np.count_nonzero(is_const) < n_const_sensors:
         if n_sensors > j >= (n_sensors - (n_const_sensors - count)):
-            didx = np.isin(piv[j:], lin_idx, invert=True)
-            dlens[didx] = 0
+            didx = ~_isin(piv[j:], lin_idx, constrained_mask)
+            dlens[didx] = kwargs.get("fill_value", 0)
     else:
         dlens = max_n(lin_idx, dlens, piv, j, n_const_sensors, **kwargs)
     return dlens
@@ -71,6 +149,12 @@ def max_n(lin_idx, dlens, piv, j, n_const_sensors, **kwargs):
         Ranked list of sensor locations.
     n_sensors: integer,
         Total number of sensors
+    constrained_mask: np.ndarray, shape [n_features], optional
+        Boolean array which is True at lin_idx.
+    fill_value: float, optional (default 0)
+        Value given to dlens at the locations which are ruled out.
+    excess_constrained: tuple or None, optional
+        Constrained sensors ruled out, as precomputed by constraint_cache.
 
     Returns
     -------
@@ -80,20 +164,20 @@ def max_n(lin_idx, dlens, piv, j, n_const_sensors, **kwargs):
         all_sensors = kwargs["all_sensors"]
     else:
         all_sensors = []
-    if "n_sensors" in kwargs.keys() and kwargs["n_sensors"] not in [None, 0]:
-        n_sensors = kwargs["n_sensors"]
+    if "excess_constrained" in kwargs.keys():
+        excess_constrained = kwargs["excess_constrained"]
     else:
-        n_sensors = len(all_sensors)
-    counter = 0
-    mask = np.isin(all_sensors, lin_idx, invert=False)
-    const_idx = all_sensors[mask]
-    updated_lin_idx = const_idx[n_const_sensors:]
-    for i in range(n_sensors):
-        if np.isin(all_sensors[i], lin_idx, invert=False):
-            counter += 1
-            if counter > n_const_sensors:
-                didx = np.isin(piv[j:], updated_lin_idx, invert=False)
-                dlens[didx] = 0
+        n_sensors = _n_sensors(all_sensors, kwargs)
+        constrained_mask = kwargs.get("constrained_mask")
+        is_const = _isin(all_sensors, lin_idx, constrained_mask)
+        excess_constrained = _excess_constrained(
+            lin_idx, n_const_sensors, all_sensors, n_sensors, is_const, constrained_mask
+        )
+    if excess_constrained is not None:
+        # Constrained sensors ranked beyond the first n_const_sensors are ruled out
+        updated_lin_idx, excess_mask = excess_constrained
+        didx = _isin(piv[j:], updated_lin_idx, excess_mask)
+        dlens[didx] = kwargs.get("fill_value", 0)
     return dlens
 
 
@@ -110,6 +194,10 @@ def predetermined(lin_idx, dlens, piv, j, n_const_sensors, **kwargs):
     piv: np.ndarray, shape [n_features], ranked list of sensor locations.
     n_const_sensors: int, number of sensors to be placed in the constrained area.
     j: int, iterative variable in the QR algorithm.
+    constrained_mask: np.ndarray, shape [n_features], optional, boolean array which
+    is True at lin_idx.
+    fill_value: float, optional (default 0), value given to dlens at the locations
+    which are ruled out.
 
     Returns
     -------
@@ -120,10 +208,10 @@ def predetermined(lin_idx, dlens, piv, j, n_const_sensors, **kwargs):
     else:
         raise ValueError("total number of sensors is not given!")
 
-    didx = np.isin(
-        piv[j:], lin_idx, invert=(n_sensors - n_const_sensors) <= j <= n_sensors
-    )
-    dlens[didx] = 0
+    didx = _isin(piv[j:], lin_idx, kwargs.get("constrained_mask"))
+    if (n_sensors - n_const_sensors) <= j <= n_sensors:
+        didx = ~didx
+    dlens[didx] = kwargs.get("fill_value", 0)
     return dlens
 
 
@@ -1,6 +1,9 @@
 """Unit tests for optimizers"""
 
+import warnings
+
 import numpy as np
+import pytest
 
 from pysensors.optimizers import CCQR, GQR, QR
 
@@ -61,6 +64,50 @@ def test_gqr_qr_equivalence(data_vandermonde):
     np.testing.assert_array_equal(gqr_sensors, qr_sensors)
 
 
+@pytest.mark.parametrize("block_size", [1, 4, 32])
+def test_gqr_block_size(data_vandermonde, block_size):
+    x = data_vandermonde
+
+    # A constraint option without constrained sensors runs the GQR factorization
+    # rather than handing over to LAPACK, but must still agree with QR
+    gqr_sensors = (
+        GQR().fit(x.T, block_size=block_size, constraint_option="max_n").get_sensors()
+    )
+    qr_sensors = QR().fit(x.T).get_sensors()
+
+    np.testing.assert_array_equal(gqr_sensors, qr_sensors)
+
+
+@pytest.mark.parametrize("block_size", [-1, 0, 2.0])
+def test_gqr_invalid_block_size(data_vandermonde, block_size):
+    x = data_vandermonde
+
+    with pytest.raises(ValueError):
+        GQR().fit(x.T, block_size=block_size, constraint_option="max_n")
+
+
+def test_gqr_qr_equivalence_complex(data_random):
+    x = data_random * np.exp(2j * np.pi * np.random.rand(*data_random.shape))
+    k = min(x.shape)
+
+    gqr_sensors = GQR().fit(x.T, block_size=4, constraint_option="max_n").get_sensors()
+    qr_sensors = QR().fit(x.T).get_sensors()
+
+    np.testing.assert_array_equal(gqr_sensors[:k], qr_sensors[:k])
+
+
+def test_gqr_float32(data_random):
+    x = data_random
+    k = min(x.shape)
+
+    gqr_sensors = (
+        GQR().fit(x.T, dtype=np.float32, constraint_option="max_n").get_sensors()
+    )
+    qr_sensors = QR().fit(x.T).get_sensors()
+
+    np.testing.assert_array_equal(gqr_sensors[:k], qr_sensors[:k])
+
+
 def test_gqr_ccqr_equivalence(data_random):
     x = data_random
 
@@ -95,6 +142,84 @@ def test_gqr_ccqr_equivalence(data_random):
     assert chosen_sensors_CCQR == chosen_sensors_GQR
 
 
+def test_gqr_exhausted_allowed_sensors():
+    # Sensor 5 duplicates sensor 0, so its norm drops to zero once sensor 0 is
+    # placed; it must still be preferred over the forbidden sensors 2, 3 and 4
+    rng = np.random.default_rng(0)
+    basis_matrix = np.zeros((6, 4))
+    basis_matrix[[0, 5], 0] = 1
+    basis_matrix[1, 1] = 1
+    basis_matrix[2:5] = rng.standard_normal((3, 4))
+    forbidden_sensors = [2, 3, 4]
+
+    sensors = (
+        GQR()
+        .fit(
+            basis_matrix,
+            idx_constrained=forbidden_sensors,
+            all_sensors=np.arange(6),
+            n_sensors=6,
+            n_const_sensors=0,
+            constraint_option="exact_n",
+        )
+        .get_sensors()
+    )
+
+    assert set(sensors[:3]) == {0, 1, 5}
+
+
+@pytest.mark.parametrize("block_size", [4, 32])
+def test_gqr_duplicated_sensors(block_size):
+    # With duplicated rows the downdated norm of an exhausted column can be stale,
+    # which must not produce a division by zero in the Householder vector
+    rng = np.random.default_rng(91)
+    basis_matrix = rng.standard_normal((10, 20))[rng.integers(0, 10, 40)]
+
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        sensors = (
+            GQR()
+            .fit(
+                basis_matrix,
+                idx_constrained=np.arange(0, 40, 3),
+                all_sensors=np.arange(40),
+                n_sensors=10,
+                n_const_sensors=2,
+                constraint_option="max_n",
+                block_size=block_size,
+            )
+            .get_sensors()
+        )
+
+    np.testing.assert_array_equal(np.sort(sensors), np.arange(40))
+
+
+def test_gqr_rank_deficient_basis():
+    # Once the rank of the basis is used up, the remaining sensors are still placed
+    # according to the constraints
+    rng = np.random.default_rng(0)
+    basis_matrix = rng.standard_normal((20, 3)) @ rng.standard_normal((3, 10))
+    idx_constrained = np.arange(10)
+    n_sensors = 8
+    n_const_sensors = 5
+
+    sensors = (
+        GQR()
+        .fit(
+            basis_matrix,
+            idx_constrained=idx_constrained,
+            all_sensors=QR().fit(basis_matrix).get_sensors(),
+            n_sensors=n_sensors,
+            n_const_sensors=n_const_sensors,
+            constraint_option="exact_n",
+        )
+        .get_sensors()
+    )
+
+    assert len(set(sensors)) == len(sensors) == 20
+    assert np.isin(sensors[:n_sensors], idx_constrained).sum() == n_const_sensors
+
+
 def test_gqr_exact_constrainted_case1(data_random):
     x = data_random
     # unconstrained sensors (optimal)
@@ -7,6 +7,7 @@ import pytest
 # from pysensors.utils._constraints import constraints_eval
 # from pysensors.utils._constraints import check_constraints
 from pysensors.utils._constraints import (
+    Cylinder,
     get_constrained_sensors_indices,
     get_constrained_sensors_indices_dataframe,
     get_coordinates_from_indices,
@@ -66,6 +67,16 @@ def test_get_constrained_sensors_indices_multiple_constrained_sensors():
         )
 
 
+def test_get_constrained_sensors_indices_non_square_grid():
+    nx, ny = 2, 3
+    all_sensors = np.arange(nx * ny)
+    result = get_constrained_sensors_indices(0, 1, 0, 2, nx, ny, all_sensors)
+    np.testing.assert_array_equal(result, [0, 2, 4, 1, 3, 5])
+
+    result = get_constrained_sensors_indices(0, 1, 1, 2, nx, ny, all_sensors)
+    np.testing.assert_array_equal(result, [2, 4, 3, 5])
+
+
 def test_valid_input_parameters():
     nx, ny, x_min, x_max, y_min, y_max = 10, 10, 2, 8, 2, 8
     all_sensors = np.array([i for i in range(nx * ny)])
@@ -403,5 +414,29 @@ def user_function():
     assert func() == 1
 
 
+# Testing Cylinder
+@pytest.mark.parametrize("axis", ["X_axis", "Y_axis", "Z_axis"])
+def test_cylinder_constraint_function(axis):
+    kwargs = dict(
+        center_x=0.5,
+        center_y=0.4,
+        center_z=0.6,
+        radius=0.3,
+        height=0.4,
+        axis=axis,
+        data=np.zeros((2, 2)),
+    )
+    coords = np.random.rand(3, 50)
+    outside = Cylinder(loc="out", **kwargs).constraint_function(coords)
+    inside = Cylinder(loc="in", **kwargs).constraint_function(coords)
+
+    np.testing.assert_array_equal(inside, ~outside)
+    for i in range(coords.shape[1]):
+        assert (
+            Cylinder(loc="out", **kwargs).constraint_function(coords[:, i])
+            == outside[i]
+        )
+
+
 if __name__ == "__main__":
     pytest.main([__file__])
@@ -0,0 +1,50 @@
+"""Unit tests for the constraint functions used by GQR"""
+
+import numpy as np
+import pytest
+
+from pysensors.utils import exact_n, max_n, predetermined
+from pysensors.utils._norm_calc import constraint_cache
+
+
+@pytest.mark.parametrize("norm_calc", [exact_n, max_n, predetermined])
+@pytest.mark.parametrize("j", [0, 5, 9, 15])
+def test_constrained_mask_equivalence(norm_calc, j):
+    n_features = 40
+    rng = np.random.default_rng(0)
+    lin_idx = np.array([3, 7, 12, 20, 33])
+    piv = rng.permutation(n_features)
+    all_sensors = rng.permutation(n_features)
+    dlens = rng.random(n_features - j)
+    constrained_mask = np.zeros(n_features, dtype=bool)
+    constrained_mask[lin_idx] = True
+    kws = dict(all_sensors=all_sensors, n_sensors=10)
+
+    expected = norm_calc(lin_idx, dlens.copy(), piv, j, 2, **kws)
+    result = norm_calc(
+        lin_idx, dlens.copy(), piv, j, 2, constrained_mask=constrained_mask, **kws
+    )
+
+    np.testing.assert_array_equal(result, expected)
+
+
+@pytest.mark.parametrize("norm_calc", [exact_n, max_n])
+@pytest.mark.parametrize("n_const_sensors", [0, 2, 8])
+@pytest.mark.parametrize("j", [0, 5, 9, 15])
+def test_constraint_cache_equivalence(norm_calc, n_const_sensors, j):
+    n_features = 40
+    rng = np.random.default_rng(0)
+    lin_idx = np.array([3, 7, 12, 20, 33])
+    piv = rng.permutation(n_features)
+    all_sensors = rng.permutation(n_features)
+    all_sensors[:4] = lin_idx[:4]
+    dlens = rng.random(n_features - j)
+    constrained_mask = np.zeros(n_features, dtype=bool)
+    constrained_mask[lin_idx] = True
+    kws = dict(all_sensors=all_sensors, n_sensors=10, constrained_mask=constrained_mask)
+
+    expected = norm_calc(lin_idx, dlens.copy(), piv, j, n_const_sensors, **kws)
+    cache = constraint_cache(lin_idx, n_const_sensors, **kws)
+    result = norm_calc(lin_idx, dlens.copy(), piv, j, n_const_sensors, **cache, **kws)
+
+    np.testing.assert_array_equal(result, expected)